@@ -11,7 +11,11 @@ setup(
     install_requires=[
         'pandas>=1.3.0',
         'numpy>=1.21.0',
+        'polars>=1.35.0',
+        'pyarrow>=10.0.0',
         'scikit-learn>=0.24.0',
+        'joblib>=1.0.0',
+        'lz4>=3.1.0',
         'matplotlib>=3.3.0',
         'click',
         'python-dotenv>=0.5.1',
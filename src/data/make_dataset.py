@@ -4,15 +4,39 @@ Data loading and preprocessing module.
 Loads raw data files and merges them into a single dataset.
 """
 
-import pandas as pd
+import polars as pl
 import click
 import logging
 from pathlib import Path
 
 
+# Tokens pd.read_csv treats as missing by default, so the Polars scans read
+# the raw files the same way
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan",
+    "1.#IND", "1.#QNAN", "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a",
+    "nan", "null",
+]
+
+
+def _drop_existing(lf, columns):
+    """Drop the given columns from a LazyFrame, skipping absent ones."""
+    existing = set(lf.collect_schema().names())
+    return lf.drop([c for c in columns if c in existing])
+
+
+def _as_categorical(lf, columns):
+    """Cast join key columns to Categorical so joins hash integer codes."""
+    return lf.with_columns(pl.col(columns).cast(pl.Categorical))
+
+
 def load_metadata(filepath):
     """Load and clean metadata file."""
-    metadata_df = pd.read_csv(filepath)
+    # The metadata file is small, so infer types from every row rather than
+    # the first 100 (e.g. integer sqm values followed by a fractional one)
+    metadata_lf = pl.scan_csv(
+        filepath, null_values=NA_VALUES, infer_schema_length=None
+    )
 
     # Drop unnecessary columns from metadata
     columns_to_drop = [
@@ -32,58 +56,78 @@ def load_metadata(filepath):
         "leed_level",
         "rating",
     ]
-    metadata_df_cleaned = metadata_df.drop(columns=columns_to_drop, errors="ignore")
+    metadata_lf = _drop_existing(metadata_lf, columns_to_drop)
 
-    return metadata_df_cleaned
+    return _as_categorical(metadata_lf, ["building_id", "site_id"])
 
 
 def load_weather(filepath):
     """Load and preprocess weather data."""
-    weather_df = pd.read_csv(filepath)
+    # Read the measurements directly as float32; unknown names are ignored
+    weather_dtypes = {
+        "airTemperature": pl.Float32,
+        "cloudCoverage": pl.Float32,
+        "dewTemperature": pl.Float32,
+        "precipDepth1HR": pl.Float32,
+        "precipDepth6HR": pl.Float32,
+        "seaLvlPressure": pl.Float32,
+        "windDirection": pl.Float32,
+        "windSpeed": pl.Float32,
+    }
+    weather_lf = pl.scan_csv(
+        filepath, schema_overrides=weather_dtypes, null_values=NA_VALUES
+    )
 
     # Convert weather timestamp to datetime
-    weather_df["timestamp"] = pd.to_datetime(
-        weather_df["timestamp"], format="%d-%m-%Y %H:%M"
+    weather_lf = weather_lf.with_columns(
+        pl.col("timestamp").str.strptime(pl.Datetime, "%d-%m-%Y %H:%M")
     )
 
-    return weather_df
+    return _as_categorical(weather_lf, ["site_id"])
 
 
 def load_electricity(filepath):
     """Load and reshape electricity usage data."""
-    electricity_df = pd.read_csv(filepath)
+    # Skip schema inference over the (very wide) file: every column is read
+    # as text and the usage values are cast once after unpivoting
+    electricity_lf = pl.scan_csv(
+        filepath, infer_schema=False, null_values=NA_VALUES
+    )
 
-    # Reshape electricity usage dataset into long format
-    electricity_long = electricity_df.melt(
-        id_vars=["building_name", "site_id"],
-        var_name="date",
+    # Reshape electricity usage dataset into long format. The date is parsed
+    # as a datetime (midnight) so it can be joined against weather timestamps.
+    electricity_long = electricity_lf.unpivot(
+        index=["building_name", "site_id"],
+        variable_name="date",
         value_name="electricity_usage",
-    )
-    electricity_long["date"] = pd.to_datetime(
-        electricity_long["date"], format="%d-%m-%Y"
+    ).with_columns(
+        pl.col("date").str.strptime(pl.Datetime, "%d-%m-%Y"),
+        pl.col("electricity_usage").cast(pl.Float64),
     )
 
-    return electricity_long
+    return _as_categorical(electricity_long, ["building_name", "site_id"])
 
 
-def merge_datasets(electricity_df, metadata_df, weather_df):
+def merge_datasets(electricity_lf, metadata_lf, weather_lf):
     """Merge electricity, metadata, and weather datasets."""
-    # Merge electricity usage with metadata
-    electricity_metadata_merged = electricity_df.merge(
-        metadata_df,
+    # Merge electricity usage with metadata, keeping metadata's building_id
+    electricity_metadata_merged = electricity_lf.join(
+        metadata_lf,
         left_on=["building_name", "site_id"],
         right_on=["building_id", "site_id"],
         how="left",
-    )
+        maintain_order="left",
+        coalesce=False,
+    ).drop("site_id_right")
 
-    # Merge with weather data
-    final_merged_dataset = electricity_metadata_merged.merge(
-        weather_df,
+    # Merge with weather data (the timestamp key is coalesced into date)
+    final_merged_dataset = electricity_metadata_merged.join(
+        weather_lf,
         left_on=["site_id", "date"],
         right_on=["site_id", "timestamp"],
         how="left",
+        maintain_order="left",
     )
-    final_merged_dataset.drop(columns=["timestamp"], inplace=True)
 
     # Drop irrelevant columns
     columns_to_drop_final = [
@@ -95,11 +139,7 @@ def merge_datasets(electricity_df, metadata_df, weather_df):
         "gas",
         "unique_space_usages",
     ]
-    final_merged_dataset_cleaned = final_merged_dataset.drop(
-        columns=columns_to_drop_final, errors="ignore"
-    )
-
-    return final_merged_dataset_cleaned
+    return _drop_existing(final_merged_dataset, columns_to_drop_final)
 
 
 @click.command()
@@ -115,23 +155,23 @@ def main(metadata_filepath, weather_filepath, electricity_filepath, output_filep
     logger = logging.getLogger(__name__)
     logger.info("Making interim dataset from raw data")
 
-    # Load datasets
+    # Load datasets (lazily; nothing is read until the final sink)
     logger.info("Loading metadata...")
-    metadata_df = load_metadata(metadata_filepath)
+    metadata_lf = load_metadata(metadata_filepath)
 
     logger.info("Loading weather data...")
-    weather_df = load_weather(weather_filepath)
+    weather_lf = load_weather(weather_filepath)
 
     logger.info("Loading electricity usage data...")
-    electricity_df = load_electricity(electricity_filepath)
+    electricity_lf = load_electricity(electricity_filepath)
 
     # Merge datasets
     logger.info("Merging datasets...")
-    final_dataset = merge_datasets(electricity_df, metadata_df, weather_df)
+    final_dataset = merge_datasets(electricity_lf, metadata_lf, weather_lf)
 
     # Save interim data
     logger.info(f"Saving interim dataset to {output_filepath}")
-    final_dataset.to_csv(output_filepath, index=False)
+    final_dataset.sink_parquet(output_filepath, compression="zstd")
     logger.info("Dataset created successfully!")
 
 
@@ -4,48 +4,64 @@ Feature engineering module.
 Creates features from the interim dataset for modeling.
 """
 import pandas as pd
+import numpy as np
 import click
 import logging
 from pathlib import Path
 
 
+# Interim columns needed to build features and identify each record
+INTERIM_COLUMNS = [
+    'building_name', 'building_id', 'site_id', 'date', 'electricity_usage',
+    'airTemperature', 'dewTemperature', 'seaLvlPressure', 'windSpeed', 'sqm'
+]
+
+
 def add_time_features(df):
     """Add time-based features."""
-    df['month'] = df['date'].dt.month
-    df['day_of_week'] = df['date'].dt.dayofweek
-    df['is_weekend'] = df['day_of_week'].isin([5, 6]).astype(int)
+    dates = df['date'].dt
+    day_of_week = dates.dayofweek.to_numpy(dtype=np.int8)
+    df['month'] = dates.month.to_numpy(dtype=np.int8)
+    df['day_of_week'] = day_of_week
+    df['is_weekend'] = (day_of_week >= 5).astype(np.int8)
     
     return df
 
 
 def add_lag_features(df):
-    """Add lag features for time series."""
-    df['lag_1'] = df['electricity_usage'].shift(1)
-    df['lag_7'] = df['electricity_usage'].shift(7)
-    df.dropna(subset=['lag_1', 'lag_7'], inplace=True)
+    """Add per-building lag features for time series."""
+    # Shift within each building so lags never leak across buildings; the
+    # first days of each building have no history and get a lag of zero
+    df = df.sort_values(['building_name', 'date'])
+    usage = df.groupby(
+        'building_name', sort=False, observed=True
+    )['electricity_usage']
+    df['lag_1'] = usage.shift(1, fill_value=0)
+    df['lag_7'] = usage.shift(7, fill_value=0)
     
     return df
 
 
 def remove_outliers(df, column='electricity_usage'):
     """Remove outliers using IQR method."""
-    Q1 = df[column].quantile(0.25)
-    Q3 = df[column].quantile(0.75)
+    values = df[column].to_numpy()
+    Q1, Q3 = np.nanquantile(values, [0.25, 0.75])
     IQR = Q3 - Q1
     lower_bound = Q1 - 1.5 * IQR
     upper_bound = Q3 + 1.5 * IQR
     
-    df_cleaned = df[
-        (df[column] >= lower_bound) &
-        (df[column] <= upper_bound)
-    ]
+    # Missing values fail both comparisons and are dropped as before
+    mask = (values >= lower_bound) & (values <= upper_bound)
+    df_cleaned = df.iloc[np.flatnonzero(mask)]
     
     return df_cleaned
 
 
 def handle_missing_values(df, predictors):
     """Impute missing values for predictors."""
-    df[predictors] = df[predictors].fillna(0)
+    # Fill in place rather than copying the predictor block and assigning
+    # it back
+    df.fillna({predictor: 0 for predictor in predictors}, inplace=True)
     return df
 
 
@@ -83,8 +99,7 @@ def main(input_filepath, output_filepath):
     
     # Load interim data
     logger.info(f'Loading data from {input_filepath}')
-    df = pd.read_csv(input_filepath)
-    df['date'] = pd.to_datetime(df['date'])
+    df = pd.read_parquet(input_filepath, columns=INTERIM_COLUMNS)
     
     # Build features
     logger.info('Engineering features...')
@@ -92,7 +107,7 @@ def main(input_filepath, output_filepath):
     
     # Save processed data
     logger.info(f'Saving processed dataset to {output_filepath}')
-    df_processed.to_csv(output_filepath, index=False)
+    df_processed.to_parquet(output_filepath, compression='zstd', index=False)
     
     # Save predictor names
     predictor_path = Path(output_filepath).parent / 'predictors.txt'
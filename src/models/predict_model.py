@@ -3,17 +3,18 @@
 Model prediction module.
 Makes predictions using trained model.
 """
-import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
 import click
 import logging
-import pickle
+import joblib
 from pathlib import Path
 
 
 def load_model(model_filepath):
     """Load trained model from file."""
-    with open(model_filepath, 'rb') as f:
-        model = pickle.load(f)
+    model = joblib.load(model_filepath)
     return model
 
 
@@ -27,9 +28,11 @@ def make_predictions(model, X):
 @click.argument('model_filepath', type=click.Path(exists=True))
 @click.argument('input_filepath', type=click.Path(exists=True))
 @click.argument('output_filepath', type=click.Path())
-def main(model_filepath, input_filepath, output_filepath):
+@click.option('--batch-size', default=200_000,
+              help='Rows predicted per batch (default: 200000)')
+def main(model_filepath, input_filepath, output_filepath, batch_size):
     """
-    Makes predictions using trained model.
+    Makes predictions using trained model, streaming the input in batches.
     """
     logger = logging.getLogger(__name__)
     logger.info('Making predictions with trained model')
@@ -38,10 +41,6 @@ def main(model_filepath, input_filepath, output_filepath):
     logger.info(f'Loading model from {model_filepath}')
     model = load_model(model_filepath)
     
-    # Load data
-    logger.info(f'Loading data from {input_filepath}')
-    df = pd.read_csv(input_filepath)
-    
     # Load predictor names
     predictor_path = Path(model_filepath).parent / 'predictors.txt'
     if predictor_path.exists():
@@ -54,16 +53,28 @@ def main(model_filepath, input_filepath, output_filepath):
             'dewTemperature', 'seaLvlPressure', 'windSpeed', 'sqm', 'lag_1', 'lag_7'
         ]
     
-    X = df[predictors]
-    
-    # Make predictions
-    logger.info('Making predictions...')
-    predictions = make_predictions(model, X)
+    # Predict batch by batch so memory use does not grow with the input;
+    # each batch is written out with its prediction column appended
+    logger.info(f'Making predictions for {input_filepath} '
+                f'and writing them to {output_filepath}')
+    input_file = pq.ParquetFile(input_filepath)
+    output_schema = input_file.schema_arrow.remove_metadata().append(
+        pa.field('predicted_electricity_usage', pa.float64())
+    )
     
-    # Save predictions
-    df['predicted_electricity_usage'] = predictions
-    logger.info(f'Saving predictions to {output_filepath}')
-    df.to_csv(output_filepath, index=False)
+    with pq.ParquetWriter(output_filepath, output_schema,
+                          compression='zstd') as writer:
+        for batch in input_file.iter_batches(batch_size=batch_size):
+            X = np.column_stack([
+                batch.column(predictor).to_numpy(zero_copy_only=False)
+                for predictor in predictors
+            ]).astype(np.float32, copy=False)
+            predictions = make_predictions(model, X)
+            batch = batch.append_column(
+                'predicted_electricity_usage',
+                pa.array(predictions, type=pa.float64())
+            )
+            writer.write_batch(batch)
     
     logger.info('Predictions completed successfully!')
 
@@ -1,18 +1,22 @@
 # -*- coding: utf-8 -*-
 """
 Model training module.
-Trains Random Forest model on processed data.
+Trains a Random Forest or histogram gradient boosting model on processed data.
 """
 
 import pandas as pd
 import numpy as np
 import click
 import logging
-import pickle
+import joblib
 from pathlib import Path
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.base import clone
+from sklearn.ensemble import (
+    RandomForestRegressor,
+    HistGradientBoostingRegressor,
+)
+from sklearn.inspection import permutation_importance
 from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import mean_squared_error, r2_score, mean_absolute_error
 
 
 def train_random_forest(X_train, y_train, n_estimators=100, random_state=42):
@@ -21,7 +25,11 @@ def train_random_forest(X_train, y_train, n_estimators=100, random_state=42):
     logger.info(f"Training Random Forest with {n_estimators} estimators...")
 
     rf_model = RandomForestRegressor(
-        n_estimators=n_estimators, random_state=random_state
+        n_estimators=n_estimators,
+        random_state=random_state,
+        n_jobs=-1,
+        bootstrap=True,
+        oob_score=True,
     )
     rf_model.fit(X_train, y_train)
 
@@ -29,6 +37,36 @@ def train_random_forest(X_train, y_train, n_estimators=100, random_state=42):
     return rf_model
 
 
+def train_hist_gradient_boosting(
+    X_train, y_train, n_estimators=100, random_state=42
+):
+    """Train histogram-based gradient boosting model."""
+    logger = logging.getLogger(__name__)
+    logger.info(
+        "Training Histogram Gradient Boosting with up to "
+        f"{n_estimators} iterations..."
+    )
+
+    hgb_model = HistGradientBoostingRegressor(
+        max_iter=n_estimators,
+        max_bins=255,
+        early_stopping=True,
+        random_state=random_state,
+    )
+    hgb_model.fit(X_train, y_train)
+
+    logger.info(
+        f"Model training completed after {hgb_model.n_iter_} iterations"
+    )
+    return hgb_model
+
+
+MODEL_TRAINERS = {
+    "random_forest": train_random_forest,
+    "hist_gradient_boosting": train_hist_gradient_boosting,
+}
+
+
 def evaluate_model(model, X_test, y_test):
     """Evaluate model performance."""
     logger = logging.getLogger(__name__)
@@ -36,11 +74,15 @@ def evaluate_model(model, X_test, y_test):
     # Make predictions
     y_pred = model.predict(X_test)
 
-    # Calculate metrics
-    mse = mean_squared_error(y_test, y_pred)
-    rmse = np.sqrt(mse)
-    r2 = r2_score(y_test, y_pred)
-    mae = mean_absolute_error(y_test, y_pred)
+    # Calculate metrics from a single residual array
+    y_true = np.asarray(y_test, dtype=np.float64)
+    residual = y_true - y_pred
+    sse = np.dot(residual, residual)
+    rmse = np.sqrt(sse / residual.size)
+    mae = np.abs(residual).mean()
+    # Total sum of squares around the mean (two passes, as sklearn does)
+    centered = y_true - y_true.mean()
+    r2 = 1.0 - sse / np.dot(centered, centered)
 
     logger.info(f"Root Mean Squared Error: {rmse:.4f}")
     logger.info(f"R^2 Score: {r2:.4f}")
@@ -50,12 +92,14 @@ def evaluate_model(model, X_test, y_test):
 
 
 def cross_validate_model(model, X, y, cv=5):
-    """Perform k-fold cross-validation."""
+    """Perform k-fold cross-validation, fitting the folds in parallel."""
     logger = logging.getLogger(__name__)
     logger.info(f"Performing {cv}-fold cross-validation...")
 
     # Use negative mean squared error for scoring
-    cv_scores = cross_val_score(model, X, y, cv=cv, scoring="neg_mean_squared_error")
+    cv_scores = cross_val_score(
+        model, X, y, cv=cv, scoring="neg_mean_squared_error", n_jobs=-1
+    )
 
     # Convert scores to positive RMSE
     rmse_scores = np.sqrt(-cv_scores)
@@ -71,10 +115,34 @@ def cross_validate_model(model, X, y, cv=5):
     }
 
 
-def get_feature_importance(model, feature_names):
-    """Get feature importance from trained model."""
+def out_of_bag_metrics(model, y_train):
+    """Compute out-of-bag metrics from a fitted Random Forest."""
+    logger = logging.getLogger(__name__)
+
+    oob_rmse = np.sqrt(np.mean((y_train - model.oob_prediction_) ** 2))
+
+    logger.info(f"OOB RMSE: {oob_rmse:.4f}")
+    logger.info(f"OOB R^2 Score: {model.oob_score_:.4f}")
+
+    return {"oob_rmse": oob_rmse, "oob_r2": model.oob_score_}
+
+
+def get_feature_importance(model, feature_names, X=None, y=None):
+    """Get feature importance from trained model.
+
+    Models without impurity-based importances (e.g. gradient boosting) fall
+    back to permutation importance, which requires ``X`` and ``y``.
+    """
+    if hasattr(model, "feature_importances_"):
+        importances = model.feature_importances_
+    else:
+        result = permutation_importance(
+            model, X, y, n_repeats=5, random_state=42
+        )
+        importances = result.importances_mean
+
     feature_importances = pd.DataFrame(
-        {"Feature": feature_names, "Importance": model.feature_importances_}
+        {"Feature": feature_names, "Importance": importances}
     ).sort_values(by="Importance", ascending=False)
 
     return feature_importances
@@ -85,26 +153,45 @@ def get_feature_importance(model, feature_names):
 @click.argument("model_filepath", type=click.Path())
 @click.option("--test-size", default=0.3, help="Test set size (default: 0.3)")
 @click.option("--n-estimators", default=100, help="Number of trees (default: 100)")
-@click.option("--cv", default=5, help="Number of cross-validation folds (default: 5)")
-def main(input_filepath, model_filepath, test_size, n_estimators, cv):
+@click.option(
+    "--cv",
+    default=5,
+    help=(
+        "Cross-validation folds for models without OOB estimates "
+        "(default: 5)"
+    ),
+)
+@click.option(
+    "--model",
+    "model_type",
+    type=click.Choice(sorted(MODEL_TRAINERS)),
+    default="random_forest",
+    help="Model to train (default: random_forest)",
+)
+def main(
+    input_filepath, model_filepath, test_size, n_estimators, cv, model_type
+):
     """
-    Trains Random Forest model on processed data.
+    Trains Random Forest or gradient boosting model on processed data.
     """
     logger = logging.getLogger(__name__)
     logger.info("Training model on processed data")
 
-    # Load processed data
-    logger.info(f"Loading data from {input_filepath}")
-    df = pd.read_csv(input_filepath)
-
     # Load predictor names
     predictor_path = Path(input_filepath).parent / "predictors.txt"
     with open(predictor_path, "r") as f:
         predictors = [line.strip() for line in f.readlines()]
 
-    # Prepare features and target
-    X = df[predictors]
-    y = df["electricity_usage"]
+    # Load processed data (only the columns used for training)
+    logger.info(f"Loading data from {input_filepath}")
+    df = pd.read_parquet(
+        input_filepath, columns=predictors + ["electricity_usage"]
+    )
+
+    # Prepare features and target as plain arrays. The trees split on float32
+    # internally, so converting once here avoids a copy inside fit
+    X = df[predictors].to_numpy(dtype=np.float32)
+    y = df["electricity_usage"].to_numpy()
 
     logger.info(f"Dataset shape: {X.shape}")
     logger.info(f"Features: {predictors}")
@@ -116,29 +203,47 @@ def main(input_filepath, model_filepath, test_size, n_estimators, cv):
     logger.info(f"Train set size: {X_train.shape[0]}, Test set size: {X_test.shape[0]}")
 
     # Train model
-    model = train_random_forest(X_train, y_train, n_estimators=n_estimators)
+    train = MODEL_TRAINERS[model_type]
+    model = train(X_train, y_train, n_estimators=n_estimators)
 
     # Evaluate model
     logger.info("Evaluating model on test set...")
     metrics = evaluate_model(model, X_test, y_test)
 
     # Get feature importance
-    feature_importance = get_feature_importance(model, predictors)
+    feature_importance = get_feature_importance(
+        model, predictors, X_test, y_test
+    )
     logger.info("Feature Importance:")
     logger.info(f"\n{feature_importance}")
 
-    # Perform cross-validation
-    cv_metrics = cross_validate_model(
-        RandomForestRegressor(n_estimators=n_estimators, random_state=42), X, y, cv=cv
-    )
+    # Random Forest already has an out-of-bag error estimate; other models
+    # are cross-validated on an unfitted copy of the same estimator
+    if hasattr(model, "oob_prediction_"):
+        oob_metrics = out_of_bag_metrics(model, y_train)
+        validation_metrics = {
+            "header": "Out-of-Bag Results",
+            "lines": {
+                "OOB RMSE": oob_metrics["oob_rmse"],
+                "OOB R^2 Score": oob_metrics["oob_r2"],
+            },
+        }
+    else:
+        cv_metrics = cross_validate_model(clone(model), X, y, cv=cv)
+        validation_metrics = {
+            "header": "Cross-Validation Results",
+            "lines": {
+                "Mean RMSE": cv_metrics["mean_rmse"],
+                "Standard Deviation of RMSE": cv_metrics["std_rmse"],
+            },
+        }
 
     # Save model
     logger.info(f"Saving model to {model_filepath}")
     model_dir = Path(model_filepath).parent
     model_dir.mkdir(parents=True, exist_ok=True)
 
-    with open(model_filepath, "wb") as f:
-        pickle.dump(model, f)
+    joblib.dump(model, model_filepath, compress=("lz4", 3))
 
     # Save metrics
     metrics_path = model_dir / "metrics.txt"
@@ -147,9 +252,9 @@ def main(input_filepath, model_filepath, test_size, n_estimators, cv):
         f.write(f"Root Mean Squared Error: {metrics['rmse']:.4f}\n")
         f.write(f"R^2 Score: {metrics['r2']:.4f}\n")
         f.write(f"Mean Absolute Error: {metrics['mae']:.4f}\n")
-        f.write(f"\n=== Cross-Validation Results ===\n")
-        f.write(f"Mean RMSE: {cv_metrics['mean_rmse']:.4f}\n")
-        f.write(f"Standard Deviation of RMSE: {cv_metrics['std_rmse']:.4f}\n")
+        f.write(f"\n=== {validation_metrics['header']} ===\n")
+        for name, value in validation_metrics["lines"].items():
+            f.write(f"{name}: {value:.4f}\n")
 
     # Save feature importance
     feature_importance_path = model_dir / "feature_importance.csv"